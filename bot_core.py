@@ -0,0 +1,66 @@
+# Pure order-building helpers shared by the sync and async bots. No I/O in
+# here, so the module can optionally be compiled with mypyc (see README);
+# the plain Python version is what runs otherwise.
+from __future__ import annotations
+
+from decimal import Decimal
+from types import MappingProxyType
+
+# fixed futures_create_order params per order type, merged into each call
+RECV_WINDOW = 5000  # small grace window for time drift
+MARKET_BASE = MappingProxyType({"type": "MARKET", "recvWindow": RECV_WINDOW})
+LIMIT_BASE = MappingProxyType({"type": "LIMIT", "recvWindow": RECV_WINDOW})
+STOP_LIMIT_BASE = MappingProxyType(
+    {"type": "STOP", "workingType": "MARK_PRICE", "recvWindow": RECV_WINDOW}
+)
+ORDER_BASES = {
+    "MARKET": MARKET_BASE,
+    "LIMIT": LIMIT_BASE,
+    "STOP_LIMIT": STOP_LIMIT_BASE,
+}
+# python-binance routes these conditional types to /fapi/v1/algoOrder, which
+# has no batch form, so place_orders() sends them one request each
+UNBATCHABLE_TYPES = frozenset({"STOP"})
+
+
+def to_api_str(value: float | str) -> str:
+    """
+    Plain decimal string for Binance: str(0.00001) gives '1e-05', which the
+    price/lot filters reject. Goes through str() first so 0.1 stays '0.1'.
+    """
+    return format(Decimal(str(value)), "f")
+
+
+def order_entry_params(order: dict) -> dict:
+    """
+    Turn one order given as a dict (a place_orders() entry) into API params,
+    without recvWindow so the result can go straight into batchOrders.
+    Entries use the place_*_order argument names plus "type", e.g.
+    {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.01, "price": 60000}.
+    Raises ValueError if the entry is incomplete.
+    """
+    order_type = order.get("type")
+    base = ORDER_BASES.get(order_type)
+    if base is None:
+        raise ValueError(f"unsupported order type: {order_type!r}")
+
+    needed = ["symbol", "side", "quantity"]
+    if order_type != "MARKET":
+        needed.append("price")
+    if order_type == "STOP_LIMIT":
+        needed.append("stop_price")
+    for field in needed:
+        if order.get(field) is None:
+            raise ValueError(f"{order_type} order is missing '{field}'")
+
+    # recvWindow belongs to the batch request, not to the individual orders
+    params = {key: value for key, value in base.items() if key != "recvWindow"}
+    params["symbol"] = order["symbol"]
+    params["side"] = order["side"]
+    params["quantity"] = to_api_str(order["quantity"])
+    if order_type != "MARKET":
+        params["price"] = to_api_str(order["price"])
+        params["timeInForce"] = order.get("time_in_force", "GTC")
+    if order_type == "STOP_LIMIT":
+        params["stopPrice"] = to_api_str(order["stop_price"])
+    return params
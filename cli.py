@@ -1,82 +1,210 @@
-import argparse
+import json
+import math
 import sys
+from collections import defaultdict
+from types import SimpleNamespace
 
-from binance.exceptions import BinanceAPIException, BinanceRequestException
-from trading_bot import create_bot_from_config
+# allowed values for the fixed-choice flags, built once at import time
+SIDES = ("BUY", "SELL")
+ORDER_TYPES = ("MARKET", "LIMIT", "STOP_LIMIT")
+TIME_IN_FORCE = ("GTC", "IOC", "FOK")
+
+# schema for the hand-rolled fast path: flag -> (dest, is_number, choices)
+FLAGS = {
+    "--symbol": ("symbol", False, None),
+    "--side": ("side", False, frozenset(SIDES)),
+    "--type": ("type", False, frozenset(ORDER_TYPES)),
+    "--quantity": ("quantity", True, None),
+    "--price": ("price", True, None),
+    "--stop_price": ("stop_price", True, None),
+    "--tif": ("tif", False, frozenset(TIME_IN_FORCE)),
+    "--orders-file": ("orders_file", False, None),
+}
+# flags that take no value: flag -> dest
+SWITCHES = {"--force-time-sync": "force_time_sync"}
+# needed unless --orders-file is given
+REQUIRED_FLAGS = ("symbol", "side", "type", "quantity")
+
+# Binance Futures Testnet rejects new positions below this notional (USDT)
+MIN_NOTIONAL = 100
+# a cached mark price may skip the live lookup if it clears MIN_NOTIONAL by this factor
+NOTIONAL_SAFETY_FACTOR = 3
+
+# price fields each order type needs on top of symbol/side/quantity
+REQUIRED_BY_TYPE = {
+    "MARKET": (),
+    "LIMIT": ("price",),
+    "STOP_LIMIT": ("price", "stop_price"),
+}
 
 
 def parse_positive_float(value: str) -> float:
     """Helper for argparse: expects a float > 0."""
+    import argparse
+
     try:
         val = float(value)
     except ValueError:
         raise argparse.ArgumentTypeError(f"could not convert '{value}' to float")
-    if val <= 0:
-        raise argparse.ArgumentTypeError("value must be greater than zero")
+    # nan/inf would reach Binance as 'NaN' / 'Infinity' (and nan passes `< 100`)
+    if not (math.isfinite(val) and val > 0):
+        raise argparse.ArgumentTypeError(
+            "value must be a finite number greater than zero"
+        )
     return val
 
 
+def _fast_parse(argv: list[str]) -> SimpleNamespace | None:
+    """
+    Walk argv by hand for the usual well-formed call, without importing argparse.
+    Returns None on anything unexpected (help, typos, bad values, missing flags)
+    so the caller can fall back to argparse for the proper message.
+    """
+    values = {spec[0]: None for spec in FLAGS.values()}
+    values.update(tif="GTC", force_time_sync=False)
+    i = 0
+    while i < len(argv):
+        if argv[i] in SWITCHES:
+            values[SWITCHES[argv[i]]] = True
+            i += 1
+            continue
+
+        flag, sep, value = argv[i].partition("=")
+        if sep:
+            i += 1
+        else:
+            if i + 1 >= len(argv) or argv[i + 1].startswith("-"):
+                return None
+            value = argv[i + 1]
+            i += 2
+
+        spec = FLAGS.get(flag)
+        if spec is None:
+            return None
+        dest, is_number, choices = spec
+
+        if choices is not None and value not in choices:
+            return None
+        if is_number:
+            try:
+                value = float(value)
+            except ValueError:
+                return None
+            if not (math.isfinite(value) and value > 0):
+                return None
+
+        values[dest] = value
+
+    if values["orders_file"] is None:
+        for dest in REQUIRED_FLAGS:
+            if values[dest] is None:
+                return None
+
+    return SimpleNamespace(**values)
+
+
 def get_arguments():
     """
-    Small wrapper around argparse, just to keep main() a bit cleaner.
+    Parse the command line, keeping main() a bit cleaner.
+    Well-formed calls go through _fast_parse; everything else (including
+    --help and errors) is handed to argparse.
     """
+    args = _fast_parse(sys.argv[1:])
+    if args is not None:
+        return args
+
+    import argparse
+
+    # --symbol/--side/--type/--quantity are required unless --orders-file is used,
+    # which argparse can't express, so that is checked after parse_args() and
+    # spelled out in the usage line / group title instead
     parser = argparse.ArgumentParser(
-        description="Tiny Binance Futures Testnet trading helper (CLI)."
+        description="Tiny Binance Futures Testnet trading helper (CLI).",
+        usage=(
+            "%(prog)s --symbol SYMBOL --side {" + ",".join(SIDES) + "}"
+            " --type {" + ",".join(ORDER_TYPES) + "} --quantity QUANTITY\n"
+            "       [--price PRICE] [--stop_price STOP_PRICE]"
+            " [--tif {" + ",".join(TIME_IN_FORCE) + "}] [--force-time-sync]\n"
+            "   or: %(prog)s --orders-file ORDERS_FILE [--force-time-sync]"
+        ),
+    )
+    single = parser.add_argument_group(
+        "single order",
+        "--symbol, --side, --type and --quantity are required"
+        " unless --orders-file is given",
     )
 
-    parser.add_argument(
+    single.add_argument(
         "--symbol",
-        required=True,
         help="pair to trade, e.g. BTCUSDT",
     )
-    parser.add_argument(
+    single.add_argument(
         "--side",
-        required=True,
-        choices=["BUY", "SELL"],
+        choices=SIDES,
         help="BUY or SELL",
     )
-    parser.add_argument(
+    single.add_argument(
         "--type",
-        required=True,
-        choices=["MARKET", "LIMIT", "STOP_LIMIT"],
+        choices=ORDER_TYPES,
         help="order type",
     )
-    parser.add_argument(
+    single.add_argument(
         "--quantity",
-        required=True,
         type=parse_positive_float,
         help="quantity to trade",
     )
-    parser.add_argument(
+    single.add_argument(
         "--price",
         type=parse_positive_float,
         help="limit price (needed for LIMIT and STOP_LIMIT)",
     )
-    parser.add_argument(
+    single.add_argument(
         "--stop_price",
         type=parse_positive_float,
         help="stop price (only for STOP_LIMIT)",
     )
-    parser.add_argument(
+    single.add_argument(
         "--tif",
         default="GTC",
-        choices=["GTC", "IOC", "FOK"],
+        choices=TIME_IN_FORCE,
         help="time in force, default GTC",
     )
+    parser.add_argument(
+        "--force-time-sync",
+        action="store_true",
+        help="always ask Binance for server time instead of reusing a recent offset",
+    )
+    parser.add_argument(
+        "--orders-file",
+        help="JSON list of orders to send as one batch instead of the single-order flags",
+    )
+
+    args = parser.parse_args()
+
+    if args.orders_file is None:
+        missing = [f"--{dest}" for dest in REQUIRED_FLAGS if getattr(args, dest) is None]
+        if missing:
+            parser.error(
+                "the following arguments are required: " + ", ".join(missing)
+            )
 
-    return parser.parse_args()
+    return args
 
 
 def validate_notional(bot, symbol: str, qty: float, price: float | None) -> bool:
     """
     Quick sanity check: Binance Futures usually wants notional >= 100 USDT.
-    If price is None (MARKET order), use current mark price from the API.
+    If price is None (MARKET order), use the (briefly cached) mark price.
+    LIMIT-style orders are checked from their own price with no API call.
     Returns True if notional looks OK, False otherwise.
     """
     try:
         if price is None:
-            mark_info = bot.client.futures_mark_price(symbol=symbol)
-            px = float(mark_info["markPrice"])
+            # an older cached price is enough when the order is clearly big enough
+            rough = bot.cached_mark_price(symbol)
+            if rough is not None and rough * qty >= MIN_NOTIONAL * NOTIONAL_SAFETY_FACTOR:
+                return True
+            px = bot.get_mark_price(symbol)
         else:
             px = float(price)
 
@@ -86,7 +214,7 @@ def validate_notional(bot, symbol: str, qty: float, price: float | None) -> bool
         print("Warning: could not check notional size:", exc)
         return True
 
-    if notional < 100:
+    if notional < MIN_NOTIONAL:
         print()
         print("Order not sent:")
         print(f"  estimated notional = {notional:.2f} USDT (price * quantity)")
@@ -97,72 +225,155 @@ def validate_notional(bot, symbol: str, qty: float, price: float | None) -> bool
     return True
 
 
+# summary printed after an order; filled from the Binance response in one write
+_ORDER_TMPL = (
+    "\n--- Order Result ---\n"
+    "Symbol      : {symbol}\n"
+    "Side        : {side}\n"
+    "Type        : {type}\n"
+    "Status      : {status}\n"
+    "Order ID    : {orderId}\n"
+    "Client ID   : {clientOrderId}\n"
+    "Price       : {price}\n"
+    "Orig Qty    : {origQty}\n"
+    "Executed Qty: {executedQty}\n"
+    "Update Time : {updateTime}\n"
+)
+
+
 def show_order_summary(order: dict) -> None:
     """Print a few fields from the order response so it's easy to read."""
-    print("\n--- Order Result ---")
-    print(f"Symbol      : {order.get('symbol')}")
-    print(f"Side        : {order.get('side')}")
-    print(f"Type        : {order.get('type')}")
-    print(f"Status      : {order.get('status')}")
-    print(f"Order ID    : {order.get('orderId')}")
-    print(f"Client ID   : {order.get('clientOrderId')}")
-    print(f"Price       : {order.get('price')}")
-    print(f"Orig Qty    : {order.get('origQty')}")
-    print(f"Executed Qty: {order.get('executedQty')}")
-    print(f"Update Time : {order.get('updateTime')}")
+    # missing keys render as None, same as order.get() would
+    sys.stdout.write(_ORDER_TMPL.format_map(defaultdict(lambda: None, order)))
 
 
-def main():
-    args = get_arguments()
-    bot = create_bot_from_config()
-
-    # basic argument checks depending on the order type
-    if args.type == "LIMIT" and args.price is None:
-        print("Error: --price is required for LIMIT orders.")
+def load_orders_file(path: str) -> list[dict]:
+    """
+    Read the batch for --orders-file: a JSON list of orders using the
+    BasicBot.place_orders keys, e.g.
+    [{"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": 0.002, "price": 60000}]
+    Prints the problem and exits if the file can't be used.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            orders = json.load(fh)
+    except (OSError, ValueError) as exc:
+        print(f"Error: could not read {path}: {exc}")
         sys.exit(1)
 
-    if args.type == "STOP_LIMIT" and (args.price is None or args.stop_price is None):
-        print("Error: --price and --stop_price are required for STOP_LIMIT orders.")
+    if not isinstance(orders, list) or not orders:
+        print(f"Error: {path} must contain a non-empty JSON list of orders.")
         sys.exit(1)
 
-    # notional check before even talking to Binance
-    if args.type == "MARKET":
-        ok = validate_notional(bot, args.symbol, args.quantity, price=None)
+    for index, order in enumerate(orders, start=1):
+        problem = find_order_problem(order)
+        if problem:
+            print(f"Error: order #{index} in {path}: {problem}.")
+            sys.exit(1)
+
+    return orders
+
+
+def find_order_problem(order) -> str | None:
+    """Say what is wrong with one batch entry, or return None if it looks fine."""
+    if not isinstance(order, dict):
+        return "expected a JSON object"
+    if order.get("type") not in ORDER_TYPES:
+        return f"type must be one of {', '.join(ORDER_TYPES)}"
+    if order.get("side") not in SIDES:
+        return f"side must be one of {', '.join(SIDES)}"
+    if not order.get("symbol"):
+        return "symbol is required"
+    if order.get("time_in_force", "GTC") not in TIME_IN_FORCE:
+        return f"time_in_force must be one of {', '.join(TIME_IN_FORCE)}"
+
+    for field in ("quantity",) + REQUIRED_BY_TYPE[order["type"]]:
+        value = order.get(field)
+        # bool is an int subclass (float(True) == 1.0), so rule it out explicitly
+        if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+            return f"{field} must be a number greater than zero"
+        try:
+            number = float(value)
+        except ValueError:
+            number = 0.0
+        ok = math.isfinite(number) and number > 0
+        if not ok:
+            return f"{field} must be a number greater than zero"
+
+    return None
+
+
+def main():
+    args = get_arguments()
+
+    if args.orders_file is not None:
+        orders = load_orders_file(args.orders_file)
     else:
-        ok = validate_notional(bot, args.symbol, args.quantity, price=args.price)
+        # basic argument checks depending on the order type (before any network call)
+        required = REQUIRED_BY_TYPE[args.type]
+        missing = [field for field in required if getattr(args, field) is None]
+        if missing:
+            flags = " and ".join(f"--{field}" for field in required)
+            verb = "is" if len(required) == 1 else "are"
+            print(f"Error: {flags} {verb} required for {args.type} orders.")
+            sys.exit(1)
 
-    if not ok:
-        sys.exit(1)
+        order = {
+            "symbol": args.symbol,
+            "side": args.side,
+            "type": args.type,
+            "quantity": args.quantity,
+        }
+        for field in required:
+            order[field] = getattr(args, field)
+        if args.type != "MARKET":
+            order["time_in_force"] = args.tif
+        orders = [order]
 
-    try:
-        if args.type == "MARKET":
-            order = bot.place_market_order(
-                symbol=args.symbol,
-                side=args.side,
-                quantity=args.quantity,
-            )
-        elif args.type == "LIMIT":
-            order = bot.place_limit_order(
-                symbol=args.symbol,
-                side=args.side,
-                quantity=args.quantity,
-                price=args.price,
-                time_in_force=args.tif,
-            )
-        elif args.type == "STOP_LIMIT":
-            order = bot.place_stop_limit_order(
-                symbol=args.symbol,
-                side=args.side,
-                quantity=args.quantity,
-                price=args.price,
-                stop_price=args.stop_price,
-                time_in_force=args.tif,
-            )
-        else:
-            print(f"Unsupported order type: {args.type}")
+    # heavy imports (python-binance, dotenv, streamlit via config) are only
+    # pulled in once the arguments are known good, so --help / bad args exit fast
+    from binance.exceptions import BinanceAPIException, BinanceRequestException
+    from trading_bot import create_bot_from_config
+
+    # MARKET orders need the mark price for the notional check, so let the bot
+    # fetch it while it syncs time instead of one round trip after the other
+    market_symbols = [o["symbol"] for o in orders if o["type"] == "MARKET"]
+    bot = create_bot_from_config(
+        prefetch_symbol=market_symbols[0] if market_symbols else None,
+        force_time_sync=args.force_time_sync,
+    )
+
+    # notional check before even talking to Binance (MARKET uses the mark price)
+    for order in orders:
+        ok = validate_notional(
+            bot,
+            order["symbol"],
+            float(order["quantity"]),
+            price=None if order["type"] == "MARKET" else float(order["price"]),
+        )
+        if not ok:
             sys.exit(1)
 
-        show_order_summary(order)
+    dispatch = {
+        "MARKET": bot.place_market_order,
+        "LIMIT": bot.place_limit_order,
+        "STOP_LIMIT": bot.place_stop_limit_order,
+    }
+
+    try:
+        if args.orders_file is not None:
+            for result in bot.place_orders(orders):
+                if "code" not in result:
+                    show_order_summary(result)
+                else:
+                    # rejections come back inline as {"code": ..., "msg": ...}
+                    print("\nOrder rejected by Binance:")
+                    print(f"  code   : {result.get('code')}")
+                    print(f"  message: {result.get('msg')}")
+        else:
+            order = orders[0]
+            kwargs = {key: value for key, value in order.items() if key != "type"}
+            show_order_summary(dispatch[order["type"]](**kwargs))
 
     except BinanceAPIException as exc:
         print("\nOrder rejected by Binance:")
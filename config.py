@@ -1,40 +1,56 @@
 # config.py
 import os
+import re
+import sys
 from dotenv import load_dotenv
 
-load_dotenv()
+# nothing to read from .env if the environment (CI, deploy) already sets every
+# variable we use; otherwise load it (it never overrides what is already set)
+_ENV_VARS = ("BINANCE_API_KEY", "BINANCE_API_SECRET", "BINANCE_TESTNET")
+if not all(os.environ.get(name) for name in _ENV_VARS):
+    load_dotenv()
+
+# leading/trailing spaces and quotes, in any mix; keys are plain ASCII
+_CLEAN_RE = re.compile(r"""^[\s"']*(.*?)[\s"']*$""", re.ASCII | re.DOTALL)
+# Binance HMAC keys and secrets are 64 letters/digits; allow a little slack
+_KEY_RE = re.compile(r"^[A-Za-z0-9]{50,80}$", re.ASCII)
+
 
 def _clean(value: str | None) -> str | None:
     """Strip spaces and quotes around keys so bad formatting doesn't break Binance."""
     if value is None:
         return None
-    return value.strip().strip('"').strip("'")
+    return _CLEAN_RE.match(value).group(1)
 
 # Local: from .env
 API_KEY = _clean(os.getenv("BINANCE_API_KEY"))
 API_SECRET = _clean(os.getenv("BINANCE_API_SECRET"))
 USE_TESTNET = str(os.getenv("BINANCE_TESTNET", "true")).strip().lower() == "true"
 
-# Deployed: override with Streamlit secrets if available
-try:
-    import streamlit as st
+# Deployed: override with Streamlit secrets if available.
+# Only look when streamlit is actually running (ui.py imports it before us);
+# importing it from the CLI just to fail is far too slow.
+if os.environ.get("STREAMLIT_SERVER_PORT") or "streamlit" in sys.modules:
+    try:
+        import streamlit as st
 
-    if "BINANCE_API_KEY" in st.secrets:
-        API_KEY = _clean(st.secrets["BINANCE_API_KEY"])
-        API_SECRET = _clean(st.secrets["BINANCE_API_SECRET"])
-        USE_TESTNET = str(
-            st.secrets.get("BINANCE_TESTNET", "true")
-        ).strip().lower() == "true"
-except Exception:
-    # when running from CLI only, streamlit import will fail – that's fine
-    pass
+        if "BINANCE_API_KEY" in st.secrets:
+            API_KEY = _clean(st.secrets["BINANCE_API_KEY"])
+            API_SECRET = _clean(st.secrets["BINANCE_API_SECRET"])
+            USE_TESTNET = str(
+                st.secrets.get("BINANCE_TESTNET", "true")
+            ).strip().lower() == "true"
+    except Exception:
+        # no secrets.toml (local streamlit run) – fall back to .env values
+        pass
 
 if not (API_KEY and API_SECRET):
     raise RuntimeError("API credentials not found (.env or Streamlit secrets).")
 
-# quick sanity check – if keys are tiny, something is wrong
-if len(API_KEY) < 20 or len(API_SECRET) < 20:
+# quick sanity check – catch a malformed key here instead of as a -2015
+# rejection from Binance after a full round trip
+if not (_KEY_RE.match(API_KEY) and _KEY_RE.match(API_SECRET)):
     raise RuntimeError(
-        f"API key/secret look too short (len={len(API_KEY)}, {len(API_SECRET)}). "
-        "Check .env / secrets formatting."
+        f"API key/secret don't look like Binance keys (len={len(API_KEY)}, {len(API_SECRET)}; "
+        "expected ~64 letters/digits). Check .env / secrets formatting."
     )
@@ -1,25 +1,157 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import hashlib
+import hmac
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
+import threading
 import time
-from typing import Dict, Any
+from urllib.request import getproxies
+import weakref
 
-from binance import Client
+import aiohttp
+from binance import AsyncClient, Client, ThreadedWebsocketManager
 from binance.exceptions import BinanceAPIException, BinanceRequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from bot_core import (
+    LIMIT_BASE,
+    MARKET_BASE,
+    RECV_WINDOW,
+    STOP_LIMIT_BASE,
+    UNBATCHABLE_TYPES,
+    order_entry_params,
+    to_api_str,
+)
 from config import API_KEY, API_SECRET, USE_TESTNET
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; python-binance's stdlib json is used otherwise
+    orjson = None
 
-# simple logger so we don't spam print() everywhere
-def _init_logger() -> logging.Logger:
-    os.makedirs("logs", exist_ok=True)
+# mark price is reused for this many seconds; the file lets separate CLI runs share it
+MARK_PRICE_TTL = 2.0
+MARK_PRICE_CACHE_FILE = os.path.join("logs", "mark_price_cache.json")
+# older cached prices are still good enough for a rough "clearly large enough" check
+MARK_PRICE_ROUGH_MAX_AGE = 3600
 
-    logger = logging.getLogger("futures_bot")
-    logger.setLevel(logging.INFO)
+# last measured server/local clock offset is reused for this long, if it was small
+TIME_OFFSET_FILE = os.path.join("logs", ".time_offset.json")
+TIME_OFFSET_MAX_AGE = 600  # seconds
+TIME_OFFSET_MAX_MS = 2000
 
-    # avoid adding handlers twice (streamlit reload, etc.)
-    if logger.handlers:
-        return logger
+# per-symbol trading filters barely change; reload futures_exchange_info after this long
+EXCHANGE_INFO_TTL = 24 * 3600  # seconds
+
+# MarketFeed: pushed mark prices older than this fall back to REST; the pushed
+# account snapshot is also re-fetched after this long in case the stream died quietly
+FEED_MARK_PRICE_MAX_AGE = 5.0  # seconds
+FEED_ACCOUNT_MAX_AGE = 60.0  # seconds
+# at most this many mark price sockets stay open; watching another symbol closes
+# the one watched least recently
+FEED_MAX_SYMBOLS = 4
+# user-stream events after which the cached account snapshot is out of date
+_ACCOUNT_CHANGING_EVENTS = frozenset(
+    {"ACCOUNT_UPDATE", "ORDER_TRADE_UPDATE", "MARGIN_CALL", "listenKeyExpired"}
+)
+
+# long-running processes (Streamlit) re-measure the offset in the background
+OFFSET_REFRESH_INTERVAL = 300.0  # seconds
+OFFSET_RETRY_MIN = 10.0  # first retry after a failed refresh, doubling up to the interval
+
+# with BasicBot(coalesce_duplicates=True) (the Streamlit panel), an identical
+# order (same symbol/side/type/qty/prices) sent again within this many seconds
+# of the first one finishing gets the first one's response instead of a second
+# POST - for double clicks on the button
+DUPLICATE_ORDER_WINDOW = 0.5
+
+# Binance takes at most this many orders per /fapi/v1/batchOrders request
+BATCH_ORDER_LIMIT = 5
+
+# AsyncBasicBot connection pool: concurrent calls each get their own kept-alive
+# connection instead of queueing behind one another
+ASYNC_MAX_CONNECTIONS = 8
+ASYNC_KEEPALIVE_TIMEOUT = 60  # seconds
+
+FUTURES_TESTNET_URL = "https://testnet.binancefuture.com/fapi"
+
+
+def _keyed_hmac_signer(api_secret: str):
+    """
+    Drop-in for BaseClient._hmac_signature: the HMAC-SHA256 key is set up once
+    and its keyed state copied per request, instead of re-keying on every call.
+    """
+    keyed = hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(query_string: str) -> str:
+        mac = keyed.copy()
+        mac.update(query_string.encode("utf-8"))
+        return mac.hexdigest()
+
+    return sign
+
+
+def _orjson_handle_response(response):
+    """Client._handle_response, but parsing the body with orjson."""
+    if not (200 <= response.status_code < 300):
+        raise BinanceAPIException(response, response.status_code, response.text)
+    if not response.content:
+        return {}
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        raise BinanceRequestException("Invalid Response: %s" % response.text)
+
+
+async def _orjson_handle_response_async(response):
+    """AsyncClient._handle_response, but parsing the body with orjson."""
+    if not 200 <= response.status < 300:
+        raise BinanceAPIException(response, response.status, await response.text())
+    body = await response.read()
+    if not body:
+        return {}
+    try:
+        return orjson.loads(body)
+    except orjson.JSONDecodeError:
+        raise BinanceRequestException(f"Invalid Response: {await response.text()}")
+
+
+def _offset_refresh_loop(bot_ref: weakref.ref, interval: float) -> None:
+    """
+    Body of the BasicBot offset refresher thread. Only holds a weak reference,
+    so the thread ends by itself once the bot has been thrown away.
+    """
+    delay = interval
+    failures = 0
+    while True:
+        time.sleep(delay)
+        bot = bot_ref()
+        if bot is None:
+            return
+        ok = bot._refresh_time_offset()
+        del bot
+
+        if ok:
+            failures = 0
+            delay = interval
+        else:
+            failures += 1
+            delay = min(interval, OFFSET_RETRY_MIN * 2 ** (failures - 1))
+
+
+def _build_log_handlers() -> list[logging.Handler]:
+    """Real file + console handlers; this is where logs/ gets created."""
+    os.makedirs("logs", exist_ok=True)
 
     file_handler = RotatingFileHandler(
         "logs/bot.log", maxBytes=1_000_000, backupCount=3
@@ -32,8 +164,46 @@ def _init_logger() -> logging.Logger:
     file_handler.setFormatter(fmt)
     console_handler.setFormatter(fmt)
 
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
+    return [file_handler, console_handler]
+
+
+# drains the log queue into the file/console handlers on its own thread
+_LISTENER: QueueListener | None = None
+
+
+def _start_log_listener() -> QueueHandler:
+    """
+    Start the background listener that owns the real handlers (once) and
+    return a QueueHandler feeding it for the logger to use. Logging a record
+    is then just a queue put, and file writes / rotation happen off the
+    order path.
+    """
+    global _LISTENER
+
+    if _LISTENER is None:
+        _LISTENER = QueueListener(
+            queue.Queue(-1), *_build_log_handlers(), respect_handler_level=True
+        )
+        _LISTENER.start()
+        # flush whatever is still queued when the CLI exits
+        atexit.register(_LISTENER.stop)
+
+    return QueueHandler(_LISTENER.queue)
+
+
+# simple logger so we don't spam print() everywhere
+# (cached: every BasicBot after the first gets the same logger for free)
+@functools.cache
+def _init_logger() -> logging.Logger:
+    logger = logging.getLogger("futures_bot")
+    logger.setLevel(logging.INFO)
+
+    # avoid adding handlers twice if this module itself gets reloaded
+    # (streamlit's file watcher), which starts a fresh cache
+    if logger.handlers:
+        return logger
+
+    logger.addHandler(_start_log_listener())
 
     return logger
 
@@ -42,51 +212,282 @@ class BasicBot:
     """
     Very small wrapper around python-binance client.
     Just enough for this assignment: account info + a few order types.
+    If orjson is installed it is used to parse Binance's responses.
     """
 
-    def __init__(self, api_key: str, api_secret: str, testnet: bool = True) -> None:
+    def __init__(
+        self,
+        api_key: str,
+        api_secret: str,
+        testnet: bool = True,
+        prefetch_symbol: str | None = None,
+        force_time_sync: bool = False,
+        offset_refresh_interval: float | None = OFFSET_REFRESH_INTERVAL,
+        coalesce_duplicates: bool = False,
+    ) -> None:
         self.logger = _init_logger()
 
-        # 1) create client WITHOUT keys and WITHOUT testnet flag
-        #    so the internal ping() in Client.__init__ hits a public endpoint.
-        self.client = Client("", "", testnet=False)
+        # 1) create the client with our keys but skip its constructor ping():
+        #    that is a full round trip whose only job is warming up DNS/TLS,
+        #    which the first real call does anyway. testnet stays False so
+        #    the time sync keeps using the public spot server time.
+        self.client = Client(api_key, api_secret, testnet=False, ping=False)
 
         # 2) route futures calls to testnet if requested
         if testnet:
-            self.client.FUTURES_URL = "https://testnet.binancefuture.com/fapi"
+            self.client.FUTURES_URL = FUTURES_TESTNET_URL
 
-        # 3) inject the real credentials
-        self.client.API_KEY = api_key
-        self.client.API_SECRET = api_secret
+        # 3) sign with a pre-keyed HMAC
+        self.client._hmac_signature = _keyed_hmac_signer(api_secret)
 
-        # IMPORTANT: also update the HTTP header that actually sends the key
-        self.client.session.headers.update({"X-MBX-APIKEY": api_key})
+        # python-binance sends every call through this one session; give it a
+        # keep-alive pool big enough that the prefetch thread and concurrent
+        # Streamlit sessions don't evict each other's TLS connections, and retry
+        # gateway hiccups. urllib3 does not retry POST by default, so an order
+        # is never sent twice.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            pool_block=False,
+            # raise_on_status=False: once retries run out, the last 5xx response
+            # still reaches python-binance, which turns it into a
+            # BinanceAPIException instead of requests raising RetryError
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.1,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False,
+            ),
+        )
+        self.client.session.mount("https://", adapter)
+        self.client.session.headers["Connection"] = "keep-alive"
+
+        # requests re-reads proxy / CA bundle env settings on every call; skip
+        # that unless something is actually configured
+        if not getproxies() and not (
+            os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE")
+        ):
+            self.client.session.trust_env = False
+
+        # python-binance parses every response via requests' stdlib-json .json()
+        if orjson is not None:
+            self.client._handle_response = _orjson_handle_response
 
         # store for possible debugging
         self.api_key = api_key
         self.api_secret = api_secret
         self.testnet = testnet
+        # off by default: scripts may well mean to send the same order twice
+        self.coalesce_duplicates = coalesce_duplicates
+
+        # 'testnet:SYMBOL' -> (mark price, time.time() when fetched), loaded on first use
+        self._mark_price_cache: dict[str, tuple[float, float]] | None = None
+        # the bot is shared by all Streamlit sessions, so cache updates and the
+        # snapshot written to disk happen under this lock
+        self._mark_price_lock = threading.Lock()
+        # symbol -> in-flight futures_mark_price call started by prefetch_mark_price()
+        self._pending_mark_prices: dict[str, Future] = {}
+        # symbol -> {filterType: filter dict}, from futures_exchange_info on first use
+        self._symbol_filters: dict[str, dict[str, dict]] | None = None
+        self._symbol_filters_ts = 0.0
+        # serializes timestamp_offset updates from __init__ and the refresher thread
+        self._offset_lock = threading.Lock()
+        # order key -> (Future with the response, time.monotonic() it stops
+        # being reused), see _send_order_once()
+        self._inflight: dict[tuple, tuple[Future, float]] = {}
+        self._inflight_lock = threading.Lock()
 
-        # 4) sync time to reduce -1021 timestamp errors
-        self._sync_time_with_server()
+        # 4) if the caller already knows the symbol, fetch its mark price in the
+        #    background so it overlaps with the time sync round trip below
+        if prefetch_symbol:
+            self.prefetch_mark_price(prefetch_symbol)
+
+        # 5) sync time to reduce -1021 timestamp errors
+        self._sync_time_with_server(force=force_time_sync)
+
+        # 6) keep the offset fresh for long-lived bots without adding a
+        #    round trip to any order (None disables it)
+        if offset_refresh_interval:
+            threading.Thread(
+                target=_offset_refresh_loop,
+                args=(weakref.ref(self), offset_refresh_interval),
+                name="binance-offset-refresh",
+                daemon=True,
+            ).start()
 
         self.logger.info("BasicBot started (testnet=%s)", testnet)
 
-    def _sync_time_with_server(self) -> None:
+    def _load_time_offset(self) -> int | None:
+        """
+        Offset saved by a recent run, or None if it is missing, stale, too large
+        or was measured against the other environment (testnet vs live).
+        """
+        try:
+            with open(TIME_OFFSET_FILE, "r", encoding="utf-8") as fh:
+                saved = json.load(fh)
+            offset = int(saved["offset"])
+            age = time.time() - float(saved["ts"])
+            testnet = bool(saved["testnet"])
+        except (OSError, ValueError, TypeError, KeyError):
+            return None
+
+        if testnet != self.testnet or not 0 <= age < TIME_OFFSET_MAX_AGE:
+            return None
+        if abs(offset) >= TIME_OFFSET_MAX_MS:
+            return None
+        return offset
+
+    def _sync_time_with_server(self, force: bool = False) -> None:
         """
         Adjust client's timestamp offset so our signed requests line up with Binance time.
+        A small offset measured in the last few minutes is reused from TIME_OFFSET_FILE
+        instead of asking the server again, unless force=True.
         If this fails we just log a warning and continue.
         """
+        if not force:
+            offset = self._load_time_offset()
+            if offset is not None:
+                with self._offset_lock:
+                    self.client.timestamp_offset = offset
+                self.logger.info("Timestamp offset reused from cache: %s ms", offset)
+                return
+
+        self._refresh_time_offset()
+
+    def _refresh_time_offset(self) -> bool:
+        """
+        Ask Binance for its time, update the offset and save it to TIME_OFFSET_FILE.
+        Returns False (after logging a warning) if the server could not be reached.
+        """
         try:
             server_time = self.client.get_server_time()
-            local_ms = int(time.time() * 1000)
+            local_ms = time.time_ns() // 1_000_000
             offset = server_time["serverTime"] - local_ms
-            self.client.timestamp_offset = offset
+            with self._offset_lock:
+                self.client.timestamp_offset = offset
             self.logger.info("Timestamp offset set to %s ms", offset)
         except Exception as exc:
             self.logger.warning("Could not sync time with Binance: %s", exc)
+            return False
+
+        try:
+            os.makedirs(os.path.dirname(TIME_OFFSET_FILE), exist_ok=True)
+            with open(TIME_OFFSET_FILE, "w", encoding="utf-8") as fh:
+                json.dump(
+                    {"offset": offset, "ts": time.time(), "testnet": self.testnet}, fh
+                )
+        except OSError as exc:
+            self.logger.warning("Could not write time offset cache: %s", exc)
+
+        return True
+
+    def _load_mark_price_cache(self) -> dict[str, tuple[float, float]]:
+        """Read the shared mark-price cache file once; a missing/broken file is just empty."""
+        if self._mark_price_cache is not None:
+            return self._mark_price_cache
+        with self._mark_price_lock:
+            if self._mark_price_cache is not None:
+                return self._mark_price_cache
+            try:
+                with open(MARK_PRICE_CACHE_FILE, "r", encoding="utf-8") as fh:
+                    raw = json.load(fh)
+                self._mark_price_cache = {
+                    key: (float(px), float(ts)) for key, (px, ts) in raw.items()
+                }
+            except (OSError, ValueError, TypeError):
+                self._mark_price_cache = {}
+        return self._mark_price_cache
+
+    def _mark_price_key(self, symbol: str) -> str:
+        # testnet and live prices differ, so they must not share cache entries
+        return f"{'testnet' if self.testnet else 'live'}:{symbol}"
+
+    def prefetch_mark_price(self, symbol: str) -> None:
+        """
+        Start fetching the mark price on a worker thread; get_mark_price() picks it up.
+        Does nothing if a fresh cached value already exists.
+        """
+        hit = self._load_mark_price_cache().get(self._mark_price_key(symbol))
+        if hit is not None and 0 <= time.time() - hit[1] < MARK_PRICE_TTL:
+            return
+        if symbol in self._pending_mark_prices:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        self._pending_mark_prices[symbol] = executor.submit(
+            self.client.futures_mark_price, symbol=symbol
+        )
+        # worker thread exits by itself once the request is done
+        executor.shutdown(wait=False)
+
+    def cached_mark_price(
+        self, symbol: str, max_age: float = MARK_PRICE_ROUGH_MAX_AGE
+    ) -> float | None:
+        """Last known mark price if it is at most max_age seconds old; never hits the API."""
+        hit = self._load_mark_price_cache().get(self._mark_price_key(symbol))
+        if hit is not None and 0 <= time.time() - hit[1] < max_age:
+            return hit[0]
+        return None
+
+    def get_mark_price(self, symbol: str) -> float:
+        """
+        Current mark price for symbol.
+        Reuses a value fetched less than MARK_PRICE_TTL seconds ago (also across
+        CLI runs via MARK_PRICE_CACHE_FILE) instead of doing another round trip.
+        """
+        cache = self._load_mark_price_cache()
+        now = time.time()
+        key = self._mark_price_key(symbol)
+
+        hit = cache.get(key)
+        if hit is not None and 0 <= now - hit[1] < MARK_PRICE_TTL:
+            return hit[0]
+
+        pending = self._pending_mark_prices.pop(symbol, None)
+        if pending is not None:
+            data = pending.result()
+        else:
+            data = self.client.futures_mark_price(symbol=symbol)
+        price = float(data["markPrice"])
+        with self._mark_price_lock:
+            cache[key] = (price, now)
+            snapshot = dict(cache)
+
+        # write a temp file and rename it, so a reader never sees half a file
+        tmp_path = f"{MARK_PRICE_CACHE_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(MARK_PRICE_CACHE_FILE), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(snapshot, fh)
+            os.replace(tmp_path, MARK_PRICE_CACHE_FILE)
+        except OSError as exc:
+            self.logger.warning("Could not write mark price cache: %s", exc)
+
+        return price
 
-    def get_account_info(self) -> Dict[str, Any]:
+    def get_symbol_filters(self, symbol: str) -> dict[str, dict]:
+        """
+        Trading filters for symbol keyed by filterType (LOT_SIZE, MIN_NOTIONAL,
+        PRICE_FILTER, ...). futures_exchange_info covers every symbol, so it is
+        fetched once and kept for EXCHANGE_INFO_TTL. Unknown symbols give {}.
+        """
+        now = time.monotonic()
+        if (
+            self._symbol_filters is None
+            or now - self._symbol_filters_ts >= EXCHANGE_INFO_TTL
+        ):
+            info = self.client.futures_exchange_info()
+            self._symbol_filters = {
+                entry["symbol"]: {f["filterType"]: f for f in entry["filters"]}
+                for entry in info["symbols"]
+            }
+            self._symbol_filters_ts = now
+            self.logger.info(
+                "Loaded exchange filters for %s symbols", len(self._symbol_filters)
+            )
+        return self._symbol_filters.get(symbol, {})
+
+    def get_account_info(self) -> dict:
         """Return futures account information (balances, positions etc.)."""
         try:
             data = self.client.futures_account()
@@ -96,29 +497,75 @@ class BasicBot:
             self.logger.error("Error while fetching account info: %s", exc)
             raise
 
+    def _send_order_once(self, key: tuple, send) -> dict:
+        """
+        Call send(). With coalesce_duplicates on, an identical order (same key)
+        that is still in flight or finished less than DUPLICATE_ORDER_WINDOW
+        ago is not sent again: we wait for it and return its response instead.
+        Failed orders are forgotten right away so they can be retried.
+        """
+        if not self.coalesce_duplicates:
+            return send()
+
+        now = time.monotonic()
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is not None and now < entry[1]:
+                fut = entry[0]
+                duplicate = True
+            else:
+                # drop finished entries so the dict doesn't grow with every order
+                expired = [k for k, (_, until) in self._inflight.items() if now >= until]
+                for old_key in expired:
+                    del self._inflight[old_key]
+                fut = Future()
+                self._inflight[key] = (fut, float("inf"))
+                duplicate = False
+
+        if duplicate:
+            self.logger.warning("Duplicate order %s, reusing the first response", key)
+            return fut.result()
+
+        try:
+            order = send()
+        except BaseException as exc:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            fut.set_exception(exc)
+            raise
+
+        with self._inflight_lock:
+            self._inflight[key] = (fut, time.monotonic() + DUPLICATE_ORDER_WINDOW)
+        fut.set_result(order)
+        return order
+
     def place_market_order(
         self,
         symbol: str,
         side: str,
         quantity: float,
-    ) -> Dict[str, Any]:
+    ) -> dict:
         """
         Send a simple MARKET order.
         side should be either 'BUY' or 'SELL'.
         """
-        self.logger.info(
-            "Sending MARKET order: symbol=%s side=%s qty=%s",
-            symbol,
-            side,
-            quantity,
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending MARKET order: symbol=%s side=%s qty=%s",
+                symbol,
+                side,
+                quantity,
+            )
         try:
-            order = self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type="MARKET",
-                quantity=quantity,
-                recvWindow=5000,  # small grace window for time drift
+            order = self._send_order_once(
+                ("MARKET", symbol, side, quantity),
+                functools.partial(
+                    self.client.futures_create_order,
+                    symbol=symbol,
+                    side=side,
+                    quantity=to_api_str(quantity),
+                    **MARKET_BASE,
+                ),
             )
             self.logger.info("Market order accepted: %s", order)
             return order
@@ -133,28 +580,32 @@ class BasicBot:
         quantity: float,
         price: float,
         time_in_force: str = "GTC",
-    ) -> Dict[str, Any]:
+    ) -> dict:
         """
         Standard LIMIT order.
         time_in_force usually: 'GTC', 'IOC', or 'FOK'.
         """
-        self.logger.info(
-            "Sending LIMIT order: %s %s qty=%s @ price=%s tif=%s",
-            symbol,
-            side,
-            quantity,
-            price,
-            time_in_force,
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending LIMIT order: %s %s qty=%s @ price=%s tif=%s",
+                symbol,
+                side,
+                quantity,
+                price,
+                time_in_force,
+            )
         try:
-            order = self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type="LIMIT",
-                timeInForce=time_in_force,
-                quantity=quantity,
-                price=str(price),  # Binance expects string for price
-                recvWindow=5000,
+            order = self._send_order_once(
+                ("LIMIT", symbol, side, quantity, price, time_in_force),
+                functools.partial(
+                    self.client.futures_create_order,
+                    symbol=symbol,
+                    side=side,
+                    timeInForce=time_in_force,
+                    quantity=to_api_str(quantity),
+                    price=to_api_str(price),  # Binance expects string for price
+                    **LIMIT_BASE,
+                ),
             )
             self.logger.info("Limit order accepted: %s", order)
             return order
@@ -170,32 +621,35 @@ class BasicBot:
         price: float,
         stop_price: float,
         time_in_force: str = "GTC",
-    ) -> Dict[str, Any]:
+    ) -> dict:
         """
         Simple STOP-LIMIT style order.
         stop_price: trigger level
         price:      actual limit price once triggered
         """
-        self.logger.info(
-            "Sending STOP-LIMIT: %s %s qty=%s limit=%s stop=%s tif=%s",
-            symbol,
-            side,
-            quantity,
-            price,
-            stop_price,
-            time_in_force,
-        )
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(
+                "Sending STOP-LIMIT: %s %s qty=%s limit=%s stop=%s tif=%s",
+                symbol,
+                side,
+                quantity,
+                price,
+                stop_price,
+                time_in_force,
+            )
         try:
-            order = self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type="STOP",
-                timeInForce=time_in_force,
-                quantity=quantity,
-                price=str(price),
-                stopPrice=str(stop_price),
-                workingType="MARK_PRICE",
-                recvWindow=5000,
+            order = self._send_order_once(
+                ("STOP_LIMIT", symbol, side, quantity, price, stop_price, time_in_force),
+                functools.partial(
+                    self.client.futures_create_order,
+                    symbol=symbol,
+                    side=side,
+                    timeInForce=time_in_force,
+                    quantity=to_api_str(quantity),
+                    price=to_api_str(price),
+                    stopPrice=to_api_str(stop_price),
+                    **STOP_LIMIT_BASE,
+                ),
             )
             self.logger.info("Stop-limit order accepted: %s", order)
             return order
@@ -203,13 +657,445 @@ class BasicBot:
             self.logger.error("Stop-limit order failed: %s", exc)
             raise
 
+    def _place_unbatched_order(self, params: dict) -> dict:
+        """
+        Send one place_orders() entry that can't go into batchOrders (STOP_LIMIT).
+        A rejection is returned as {"code": ..., "msg": ...} like a batch one.
+        """
+        try:
+            return self.client.futures_create_order(**params, recvWindow=RECV_WINDOW)
+        except BinanceAPIException as exc:
+            return {"code": exc.code, "msg": exc.message}
+
+    def place_orders(self, orders: list[dict]) -> list[dict]:
+        """
+        Send several orders in as few requests as possible (batchOrders endpoint,
+        BATCH_ORDER_LIMIT per request). STOP_LIMIT entries go to Binance's algo
+        order endpoint, which has no batch form, so each of those is sent on its
+        own after the batches. Every entry is validated before anything is sent.
+        Returns one item per order, in the same order: the order response,
+        or Binance's {"code": ..., "msg": ...} if that order alone was rejected.
+        """
+        batch = [order_entry_params(order) for order in orders]
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Sending batch of %s orders: %s", len(batch), batch)
+
+        unbatched = [
+            i for i, params in enumerate(batch) if params["type"] in UNBATCHABLE_TYPES
+        ]
+        batched = [i for i in range(len(batch)) if i not in unbatched]
+
+        answered: dict[int, dict] = {}
+        try:
+            for start in range(0, len(batched), BATCH_ORDER_LIMIT):
+                chunk = batched[start:start + BATCH_ORDER_LIMIT]
+                # python-binance does the JSON encoding of the list itself
+                answers = self.client.futures_place_batch_order(
+                    batchOrders=[batch[i] for i in chunk]
+                )
+                answered.update(zip(chunk, answers))
+            for i in unbatched:
+                answered[i] = self._place_unbatched_order(batch[i])
+        except (BinanceAPIException, BinanceRequestException) as exc:
+            # earlier requests may already be on the book
+            self.logger.error(
+                "Batch order failed after %s answered orders %s: %s",
+                len(answered),
+                list(answered.values()),
+                exc,
+            )
+            raise
+
+        results = [answered[i] for i in range(len(batch))]
+
+        self.logger.info("Batch orders answered: %s", results)
+        return results
+
+
+class MarketFeed:
+    """
+    Websocket side channel for a long-running BasicBot (the Streamlit panel).
+    Mark prices are pushed per watched symbol and the futures user stream tells
+    us when the account changed, so repeated mark-price / account reads are
+    served from memory. Anything not (freshly) seen yet goes to the bot's REST
+    calls, and if the websockets can't start at all the feed is just that.
+    """
+
+    def __init__(self, bot: BasicBot) -> None:
+        self.bot = bot
+        self.logger = bot.logger
+        self._lock = threading.Lock()
+
+        # symbol -> (mark price, time.monotonic() when pushed)
+        self._mark: dict[str, tuple[float, float]] = {}
+        # symbol -> socket name for the symbols we subscribed to, least recently
+        # watched first; only touched under _watch_lock, which is separate from
+        # _lock because subscribing can block for a few seconds
+        self._mark_sockets: OrderedDict[str, str] = OrderedDict()
+        self._watch_lock = threading.Lock()
+        # (futures_account() snapshot, time.monotonic() when fetched), or None
+        self._account: tuple[dict, float] | None = None
+
+        self._twm: ThreadedWebsocketManager | None = None
+        twm = None
+        try:
+            twm = ThreadedWebsocketManager(
+                api_key=bot.api_key, api_secret=bot.api_secret, testnet=bot.testnet
+            )
+            # daemon like the offset refresher: nothing stops the feed when the
+            # Streamlit server shuts down, and a non-daemon loop would block exit
+            twm.daemon = True
+            twm.start()
+            twm.start_futures_user_socket(callback=self._on_user_event)
+            self._twm = twm
+            self.logger.info("MarketFeed started (testnet=%s)", bot.testnet)
+        except Exception as exc:
+            self.logger.warning("MarketFeed websockets unavailable, using REST: %s", exc)
+            # don't leave a started manager thread behind
+            if twm is not None:
+                try:
+                    twm.stop()
+                except Exception:
+                    pass
+
+    def stop(self) -> None:
+        """Close the websocket connections."""
+        if self._twm is not None:
+            self._twm.stop()
+            self._twm = None
+
+    def watch(self, symbol: str) -> None:
+        """
+        Subscribe to symbol's mark price stream (once). Symbols Binance doesn't
+        list are skipped, and past FEED_MAX_SYMBOLS the least recently watched
+        stream is closed.
+        """
+        twm = self._twm
+        if twm is None:
+            return
+        with self._watch_lock:
+            if symbol in self._mark_sockets:
+                self._mark_sockets.move_to_end(symbol)
+                return
+            try:
+                # typos in the Symbol box shouldn't each cost a socket
+                if not self.bot.get_symbol_filters(symbol):
+                    return
+                self._mark_sockets[symbol] = twm.start_symbol_mark_price_socket(
+                    callback=self._on_mark_price, symbol=symbol
+                )
+            except Exception as exc:
+                self.logger.warning(
+                    "Could not subscribe to %s mark price: %s", symbol, exc
+                )
+                return
+
+            while len(self._mark_sockets) > FEED_MAX_SYMBOLS:
+                old_symbol, socket_name = self._mark_sockets.popitem(last=False)
+                twm.stop_socket(socket_name)
+                with self._lock:
+                    self._mark.pop(old_symbol, None)
+
+    def get_mark_price(self, symbol: str) -> float:
+        """Latest pushed mark price for symbol, or BasicBot.get_mark_price if none is fresh."""
+        self.watch(symbol)
+        with self._lock:
+            hit = self._mark.get(symbol)
+        if hit is not None and time.monotonic() - hit[1] < FEED_MARK_PRICE_MAX_AGE:
+            return hit[0]
+        return self.bot.get_mark_price(symbol)
+
+    def get_account_info(self) -> dict:
+        """
+        Futures account snapshot, re-fetched over REST only after the user
+        stream reported a change (or FEED_ACCOUNT_MAX_AGE passed).
+        """
+        with self._lock:
+            cached = self._account
+        if (
+            self._twm is not None
+            and cached is not None
+            and time.monotonic() - cached[1] < FEED_ACCOUNT_MAX_AGE
+        ):
+            return cached[0]
+
+        data = self.bot.get_account_info()
+        with self._lock:
+            self._account = (data, time.monotonic())
+        return data
+
+    def invalidate_account(self) -> None:
+        """Forget the account snapshot, e.g. right after placing an order."""
+        with self._lock:
+            self._account = None
+
+    def _on_mark_price(self, msg: dict) -> None:
+        # markPriceUpdate: {"e": "markPriceUpdate", "s": "BTCUSDT", "p": "60000.1", ...}
+        # (combined-stream connections wrap it as {"stream": ..., "data": {...}})
+        msg = msg.get("data", msg)
+        if msg.get("e") != "markPriceUpdate":
+            if msg.get("e") == "error":
+                self.logger.warning("Mark price stream error: %s", msg)
+            return
+        with self._lock:
+            self._mark[msg["s"]] = (float(msg["p"]), time.monotonic())
+
+    def _on_user_event(self, msg: dict) -> None:
+        event = msg.get("e")
+        if event == "error":
+            self.logger.warning("User data stream error: %s", msg)
+        if event == "error" or event in _ACCOUNT_CHANGING_EVENTS:
+            self.invalidate_account()
+
+
+class AsyncBasicBot:
+    """
+    asyncio flavour of BasicBot on top of binance.AsyncClient (one aiohttp
+    session for the bot's lifetime), so several calls can be in flight at
+    once via asyncio.gather. Build it with `await AsyncBasicBot.create(...)`
+    and `await bot.close()` when done. Uses orjson for responses if installed.
+    """
+
+    def __init__(self, client: AsyncClient, testnet: bool) -> None:
+        self.logger = _init_logger()
+        self.client = client
+        self.testnet = testnet
+
+        # symbol -> (mark price, time.monotonic() when fetched); in-memory only
+        self._mark_price_cache: dict[str, tuple[float, float]] = {}
+
+    @classmethod
+    async def create(
+        cls, api_key: str, api_secret: str, testnet: bool = True
+    ) -> AsyncBasicBot:
+        """
+        Set up the client like BasicBot.__init__ does. The AsyncClient is built
+        directly rather than via AsyncClient.create(), which would spend a
+        round trip on ping() before its server time sync.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=ASYNC_MAX_CONNECTIONS,
+            limit_per_host=ASYNC_MAX_CONNECTIONS,
+            keepalive_timeout=ASYNC_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        client = AsyncClient(
+            api_key,
+            api_secret,
+            testnet=False,
+            session_params={"connector": connector},
+        )
+
+        if testnet:
+            client.FUTURES_URL = FUTURES_TESTNET_URL
+
+        client._hmac_signature = _keyed_hmac_signer(api_secret)
+
+        if orjson is not None:
+            client._handle_response = _orjson_handle_response_async
+
+        bot = cls(client, testnet)
+
+        try:
+            server_time = await client.get_server_time()
+            local_ms = time.time_ns() // 1_000_000
+            client.timestamp_offset = server_time["serverTime"] - local_ms
+        except Exception as exc:
+            bot.logger.warning("Could not sync time with Binance: %s", exc)
+
+        bot.logger.info(
+            "AsyncBasicBot started (testnet=%s, offset=%s ms)",
+            testnet,
+            client.timestamp_offset,
+        )
+        return bot
+
+    async def close(self) -> None:
+        """Close the underlying aiohttp session."""
+        await self.client.close_connection()
+
+    async def get_mark_price(self, symbol: str) -> float:
+        """Current mark price for symbol, reused for MARK_PRICE_TTL seconds."""
+        now = time.monotonic()
+        hit = self._mark_price_cache.get(symbol)
+        if hit is not None and now - hit[1] < MARK_PRICE_TTL:
+            return hit[0]
+
+        data = await self.client.futures_mark_price(symbol=symbol)
+        price = float(data["markPrice"])
+        self._mark_price_cache[symbol] = (price, now)
+        return price
+
+    async def get_account_info(self) -> dict:
+        """Return futures account information (balances, positions etc.)."""
+        try:
+            data = await self.client.futures_account()
+            self.logger.info("Fetched futures account info")
+            return data
+        except (BinanceAPIException, BinanceRequestException) as exc:
+            self.logger.error("Error while fetching account info: %s", exc)
+            raise
+
+    async def place_order(self, order: dict) -> dict:
+        """
+        Send one order described like a place_orders() entry, e.g.
+        {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.002}.
+        """
+        params = order_entry_params(order)
+        params["recvWindow"] = RECV_WINDOW
+
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Sending %s order: %s", order["type"], params)
+        try:
+            result = await self.client.futures_create_order(**params)
+            self.logger.info("%s order accepted: %s", order["type"], result)
+            return result
+        except (BinanceAPIException, BinanceRequestException) as exc:
+            self.logger.error("%s order failed: %s", order["type"], exc)
+            raise
+
+    async def place_market_order(
+        self, symbol: str, side: str, quantity: float
+    ) -> dict:
+        """Send a simple MARKET order."""
+        return await self.place_order(
+            {"symbol": symbol, "side": side, "type": "MARKET", "quantity": quantity}
+        )
+
+    async def place_limit_order(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        price: float,
+        time_in_force: str = "GTC",
+    ) -> dict:
+        """Standard LIMIT order."""
+        return await self.place_order(
+            {
+                "symbol": symbol,
+                "side": side,
+                "type": "LIMIT",
+                "quantity": quantity,
+                "price": price,
+                "time_in_force": time_in_force,
+            }
+        )
+
+    async def place_stop_limit_order(
+        self,
+        symbol: str,
+        side: str,
+        quantity: float,
+        price: float,
+        stop_price: float,
+        time_in_force: str = "GTC",
+    ) -> dict:
+        """STOP-LIMIT order: stop_price triggers, price is the resulting limit."""
+        return await self.place_order(
+            {
+                "symbol": symbol,
+                "side": side,
+                "type": "STOP_LIMIT",
+                "quantity": quantity,
+                "price": price,
+                "stop_price": stop_price,
+                "time_in_force": time_in_force,
+            }
+        )
+
+    async def _place_unbatched_order(self, params: dict) -> list[dict]:
+        """
+        Async BasicBot._place_unbatched_order; the answer is wrapped in a
+        list so it lines up with the batchOrders answers in place_orders.
+        """
+        try:
+            return [
+                await self.client.futures_create_order(**params, recvWindow=RECV_WINDOW)
+            ]
+        except BinanceAPIException as exc:
+            return [{"code": exc.code, "msg": exc.message}]
+
+    async def place_orders(self, orders: list[dict]) -> list[dict]:
+        """
+        Like BasicBot.place_orders, but the batchOrders requests for each
+        group of BATCH_ORDER_LIMIT orders, and the single requests for
+        STOP_LIMIT entries, are all sent concurrently.
+        """
+        batch = [order_entry_params(order) for order in orders]
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Sending batch of %s orders: %s", len(batch), batch)
+
+        unbatched = [
+            i for i, params in enumerate(batch) if params["type"] in UNBATCHABLE_TYPES
+        ]
+        batched = [i for i in range(len(batch)) if i not in unbatched]
 
-def create_bot_from_config() -> BasicBot:
+        # groups of batch indexes, one request each
+        groups = [
+            batched[start:start + BATCH_ORDER_LIMIT]
+            for start in range(0, len(batched), BATCH_ORDER_LIMIT)
+        ]
+        calls = [
+            self.client.futures_place_batch_order(
+                batchOrders=[batch[i] for i in group]
+            )
+            for group in groups
+        ]
+        groups += [[i] for i in unbatched]
+        calls += [self._place_unbatched_order(batch[i]) for i in unbatched]
+
+        # wait for every request even if one fails: the others may already
+        # be on the book and have to show up in the log
+        answers = await asyncio.gather(*calls, return_exceptions=True)
+
+        answered: dict[int, dict] = {}
+        failure: BaseException | None = None
+        for group, answer in zip(groups, answers):
+            if isinstance(answer, BaseException):
+                failure = failure or answer
+                continue
+            answered.update(zip(group, answer))
+
+        if failure is not None:
+            self.logger.error(
+                "Batch order failed after %s answered orders %s: %s",
+                len(answered),
+                [answered[i] for i in sorted(answered)],
+                failure,
+            )
+            raise failure
+
+        results = [answered[i] for i in range(len(batch))]
+        self.logger.info("Batch orders answered: %s", results)
+        return results
+
+
+def create_bot_from_config(
+    prefetch_symbol: str | None = None,
+    force_time_sync: bool = False,
+    coalesce_duplicates: bool = False,
+) -> BasicBot:
     """
     Helper so other modules don't need to know where API keys come from.
+    prefetch_symbol: start loading this symbol's mark price during startup.
+    force_time_sync: ignore the cached clock offset and ask the server.
+    coalesce_duplicates: answer repeats of an order just sent with its response.
     """
     return BasicBot(
         api_key=API_KEY,
         api_secret=API_SECRET,
         testnet=USE_TESTNET,
+        prefetch_symbol=prefetch_symbol,
+        force_time_sync=force_time_sync,
+        coalesce_duplicates=coalesce_duplicates,
+    )
+
+
+async def create_async_bot_from_config() -> AsyncBasicBot:
+    """Async counterpart of create_bot_from_config."""
+    return await AsyncBasicBot.create(
+        api_key=API_KEY,
+        api_secret=API_SECRET,
+        testnet=USE_TESTNET,
     )
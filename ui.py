@@ -1,19 +1,52 @@
 # ui.py
+from decimal import Decimal, ROUND_DOWN
+
 import streamlit as st
 from binance.exceptions import BinanceAPIException, BinanceRequestException
 
-from trading_bot import create_bot_from_config
+from trading_bot import MarketFeed, create_bot_from_config
+
+# used when the exchange filters don't say otherwise (USDT)
+DEFAULT_MIN_NOTIONAL = 100.0
+
+
+@st.cache_resource
+def get_bot():
+    """
+    Build the bot once per Streamlit server process instead of on every rerun
+    (each widget change reruns main(), and a new bot means a time sync).
+    A double click on "Place order" gets the first order's response back
+    instead of placing the same order twice.
+    """
+    return create_bot_from_config(coalesce_duplicates=True)
+
+
+@st.cache_resource
+def get_market_feed(_bot) -> MarketFeed:
+    """
+    One websocket feed per Streamlit server process, shared by all reruns
+    (the leading underscore keeps streamlit from trying to hash the bot).
+    """
+    return MarketFeed(_bot)
 
 
-def validate_notional_size(bot, symbol: str, qty: float, price: float | None) -> bool:
+def validate_notional_size(
+    bot, feed: MarketFeed, symbol: str, qty: float, price: float | None
+) -> bool:
     """
     Quick check so we don't send obviously too small orders.
-    If price is None (for MARKET), we pull current mark price.
+    The minimum comes from the symbol's MIN_NOTIONAL filter (exchange info is
+    cached by the bot). LIMIT / STOP_LIMIT use their own price, no round trip;
+    if price is None (for MARKET), the feed's pushed mark price is used.
     """
     try:
+        filters = bot.get_symbol_filters(symbol)
+        min_notional = float(
+            filters.get("MIN_NOTIONAL", {}).get("notional", DEFAULT_MIN_NOTIONAL)
+        )
+
         if price is None:
-            mark = bot.client.futures_mark_price(symbol=symbol)
-            px = float(mark["markPrice"])
+            px = feed.get_mark_price(symbol)
         else:
             px = float(price)
 
@@ -23,11 +56,11 @@ def validate_notional_size(bot, symbol: str, qty: float, price: float | None) ->
         st.warning(f"Could not check notional size: {exc}")
         return True
 
-    if notional < 100:
+    if notional < min_notional:
         st.error(
             f"Estimated notional is only **{notional:.2f} USDT**.\n\n"
             "For opening new positions, Binance Futures Testnet expects roughly "
-            "**100 USDT or more**.\n"
+            f"**{min_notional:g} USDT or more** for {symbol}.\n"
             "Try increasing the quantity or using a cheaper symbol."
         )
         return False
@@ -35,10 +68,57 @@ def validate_notional_size(bot, symbol: str, qty: float, price: float | None) ->
     return True
 
 
-def render_account_box(bot) -> None:
+def validate_lot_size(bot, symbol: str, qty: float, order_type: str) -> bool:
+    """
+    Check quantity against the symbol's LOT_SIZE (MARKET_LOT_SIZE for MARKET)
+    filter from the cached exchange info, so a bad size or symbol is rejected
+    here instead of by Binance one round trip later.
+    """
+    try:
+        filters = bot.get_symbol_filters(symbol)
+    except Exception as exc:
+        st.warning(f"Could not check quantity step: {exc}")
+        return True
+
+    if not filters:
+        st.error(f"Unknown symbol **{symbol}** on Binance Futures.")
+        return False
+
+    lot = filters.get("MARKET_LOT_SIZE") if order_type == "MARKET" else None
+    lot = lot or filters.get("LOT_SIZE")
+    if not lot:
+        return True
+
+    # Decimal so 0.003 is really a multiple of 0.001 (floats say otherwise)
+    amount = Decimal(str(qty))
+    min_qty = Decimal(lot["minQty"])
+    max_qty = Decimal(lot["maxQty"])
+    step = Decimal(lot["stepSize"])
+
+    if amount < min_qty or amount > max_qty:
+        st.error(
+            f"Quantity must be between **{min_qty.normalize():f}** and "
+            f"**{max_qty.normalize():f}** for {symbol}."
+        )
+        return False
+
+    if step > 0 and (amount - min_qty) % step != 0:
+        suggestion = min_qty + ((amount - min_qty) / step).quantize(
+            Decimal(1), rounding=ROUND_DOWN
+        ) * step
+        st.error(
+            f"Quantity must be a multiple of **{step.normalize():f}** for {symbol} "
+            f"(e.g. **{suggestion.normalize():f}**)."
+        )
+        return False
+
+    return True
+
+
+def render_account_box(feed: MarketFeed) -> None:
     """Show a small card with USDT balance, if we can fetch it."""
     try:
-        info = bot.get_account_info()
+        info = feed.get_account_info()
         st.subheader("Futures Account (USDT-M)")
 
         assets = info.get("assets", [])
@@ -59,18 +139,22 @@ def main():
     st.title("Binance Futures Testnet – Mini Trading Panel")
     st.caption("Simple assignment project: MARKET / LIMIT / STOP-LIMIT orders.")
 
-    bot = create_bot_from_config()
+    bot = get_bot()
+    feed = get_market_feed(bot)
 
     # left sidebar: just account-related stuff
     with st.sidebar:
         st.header("Account")
         if st.button("Load account info"):
-            render_account_box(bot)
+            render_account_box(feed)
 
     st.subheader("Create Order")
 
     # basic form inputs
     symbol = st.text_input("Symbol", value="BTCUSDT", help="Example: BTCUSDT, ETHUSDT")
+    if symbol:
+        # start streaming its mark price now, so it's in memory by submit time
+        feed.watch(symbol)
     side = st.radio("Side", options=["BUY", "SELL"], horizontal=True)
 
     order_type = st.selectbox(
@@ -132,12 +216,16 @@ def main():
                 st.error("Both limit price and stop price must be > 0 for STOP_LIMIT.")
                 return
 
+        # quantity vs. the symbol's lot size rules (cached exchange info, no RTT)
+        if not validate_lot_size(bot, symbol, qty, order_type):
+            return
+
         # notional check before sending the request
         if order_type == "MARKET":
-            if not validate_notional_size(bot, symbol, qty, price=None):
+            if not validate_notional_size(bot, feed, symbol, qty, price=None):
                 return
         else:
-            if not validate_notional_size(bot, symbol, qty, price=limit_price):
+            if not validate_notional_size(bot, feed, symbol, qty, price=limit_price):
                 return
 
         try:
@@ -169,6 +257,8 @@ def main():
                 st.error(f"Order type '{order_type}' is not supported.")
                 return
 
+            # balances changed; don't wait for the user stream to say so
+            feed.invalidate_account()
             st.success("Order placed successfully.")
             # show raw JSON so it's clear what Binance returned
             st.json(order)